@@ -1,21 +1,33 @@
 import asyncio
+import atexit
+import contextvars
 import logging
+import math
+import queue
+import secrets
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
 from functools import wraps
+from itertools import islice
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Callable, Tuple
-from uuid import uuid4
-import re
+from typing import Dict, List, Any, Optional, Callable, Tuple, Set, Coroutine, Awaitable
 import html
 import sys
 import os
+import time
 
 from telegram import (
+    Bot,
     Update,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
     Message,
 )
+from telegram.error import RetryAfter
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CommandHandler,
     MessageHandler,
@@ -26,9 +38,9 @@ from telegram.ext import (
 )
 
 from config import TELEGRAM_BOT_TOKEN
-from downloader import search_tpb, add_torrent, monitor_download, retry_download
+from downloader import search_tpb, add_torrent, retry_download
 from unpacker import unpack_download_if_needed
-from plex_uploader import update_plex_library, get_recent_movies
+from plex_uploader import update_plex_library, get_recent_movies, plex_library_type
 from notifier import send_notification, notify_admins
 from rate_limiter import rate_limit
 from security import restricted_access, admin_only, check_file_size_limit, security
@@ -37,67 +49,242 @@ from user_manager import user_manager, UserRole
 # Define conversation states
 MOVIE, SELECT, CONFIRM = range(3)
 
+# Number of searches kept per user, and how many of them are shown by /history
+SEARCH_HISTORY_SIZE = 50
+HISTORY_DISPLAY_SIZE = 10
+HISTORY_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+
+# Size units in bytes
+MB = 1 << 20
+GB = 1 << 30
+# Display units, largest first; sizes below every threshold use the last one
+SIZE_UNITS = ((GB, "GB"), (MB, "MB"))
+
+# Thread and process details aren't in the log format, so don't collect them
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
 # Ensure logs directory exists
 os.makedirs("logs", exist_ok=True)
 
 # Set up logging with proper encoding for Windows console
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", 
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler("logs/bot.log", encoding='utf-8'),
-    ]
-)
+log_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+file_handler = logging.FileHandler("logs/bot.log", encoding='utf-8')
+file_handler.setFormatter(log_formatter)
 
 # Add console handler with proper encoding
 console_handler = logging.StreamHandler(stream=sys.stdout)
-console_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
-logging.getLogger().addHandler(console_handler)
+console_handler.setFormatter(log_formatter)
+
+# Write log records from a background thread so handlers never block the event loop
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# The queue handler replaces the root handlers config set up, so no handler
+# writes on the event loop and console lines aren't duplicated; the root
+# level set from LOG_LEVEL is kept. It only passes the message on, and the
+# listener's handlers do the formatting.
+queue_handler = QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(handlers=[queue_handler], force=True)
 
 logger = logging.getLogger(__name__)
 logger.info("Bot logging initialized")
 
-# Define specific error messages based on the function and error type
+# Define specific error messages based on the function and error type.
+# Exceptions are keyed by class so that subclasses match as well.
 error_messages = {
     "default": "An unexpected error occurred. Please try again later.",
     "search_movie": {
-        "ConnectionError": "Unable to connect to torrent site. Please try again later.",
-        "TimeoutError": "Search request timed out. Please try again.",
+        ConnectionError: "Unable to connect to torrent site. Please try again later.",
+        TimeoutError: "Search request timed out. Please try again.",
         "default": "Failed to search for movies. Please try again later."
     },
     "select_torrent": {
-        "ValueError": "Invalid selection. Please choose a number from the list.",
-        "KeyError": "Selected torrent information is no longer available. Please search again.",
+        ValueError: "Invalid selection. Please choose a number from the list.",
+        KeyError: "Selected torrent information is no longer available. Please search again.",
         "default": "Failed to process your selection. Please try again."
     },
     "process_torrent": {
-        "IOError": "Failed to save the downloaded file. Please try again.",
+        # Both are OSError subclasses, so they need entries of their own
+        ConnectionError: "Lost connection while processing the download. Please try again later.",
+        TimeoutError: "Processing the download timed out. Please try again later.",
+        IOError: "Failed to save the downloaded file. Please try again.",
         "default": "Failed to process the download. Please try another torrent."
     },
 }
 
+def error_message_lookup(func_name: str) -> Callable[[Exception], str]:
+    """
+    Build the error message lookup for a handler
+    
+    The handler's table and default message are resolved once, so the
+    decorator can bind the lookup when it wraps the handler.
+    
+    Args:
+        func_name: Name of the handler
+        
+    Returns:
+        A function giving the most specific message configured for an
+        error's class hierarchy, or the handler's default message
+    """
+    func_errors = error_messages.get(func_name, {})
+    default_msg = func_errors.get("default", error_messages["default"])
+    
+    def lookup(error: Exception) -> str:
+        for error_type in type(error).__mro__:
+            if error_type in func_errors:
+                return func_errors[error_type]
+        return default_msg
+    
+    return lookup
+
+# Error messages for searches and download processing, which run as background
+# tasks outside async_error_handler
+get_search_error_message = error_message_lookup("search_movie")
+get_process_torrent_error_message = error_message_lookup("process_torrent")
+
+# Running background tasks (torrent processing, Plex update worker)
+background_tasks: Set[asyncio.Task] = set()
+
+# Downloads are processed one at a time per chat, and at most
+# MAX_CONCURRENT_DOWNLOADS at once overall
+MAX_CONCURRENT_DOWNLOADS = 4
+_download_slots: Optional[asyncio.Semaphore] = None
+# Per-chat lock and the number of downloads holding or waiting for it; the
+# entry is dropped when the chat's last download finishes
+_chat_download_locks: Dict[int, Tuple[asyncio.Lock, int]] = {}
+
+# Maximum number of threads running blocking I/O calls
+IO_WORKER_THREADS = 8
+
+# Long-polling timeout for getUpdates; Telegram holds the request open until an
+# update arrives, so a long timeout means far fewer round-trips while idle
+POLLING_TIMEOUT = 30  # seconds
+# Optional webhook mode, read from the environment like the rest of the config.
+# WEBHOOK_URL is the public HTTPS base URL that Telegram can reach.
+USE_WEBHOOK = os.getenv("USE_WEBHOOK", "false").lower() in ("1", "true", "yes")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+# Update types the bot handles
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+# Maximum number of updates handled at the same time
+MAX_CONCURRENT_UPDATES = 32
+# HTTP connections shared by concurrent handlers calling the Bot API
+CONNECTION_POOL_SIZE = 16
+
+# Plex scans requested within this window are coalesced into one scan per library
+PLEX_UPDATE_DEBOUNCE = 3  # seconds
+# Pending Plex scans: (path, future for the result message); created in post_init
+plex_update_queue: Optional[asyncio.Queue] = None
+
+# Rendered /recent reply: (monotonic timestamp, message); dropped after Plex scans
+RECENT_CACHE_TTL = 30  # seconds
+_recent_reply: Optional[Tuple[float, str]] = None
+
+# Cache of recent search results: {normalized query: (expiry time, torrents)}
+SEARCH_CACHE_TTL = 600  # seconds
+# Searches that found nothing are remembered for a shorter time
+SEARCH_EMPTY_CACHE_TTL = 60  # seconds
+SEARCH_CACHE_MAX_SIZE = 256
+_search_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+# Searches currently in progress: {normalized query: task}
+_search_inflight: Dict[str, asyncio.Future] = {}
+
+# Translation table for Telegram's MarkdownV2 format.
+# Characters that need to be escaped: \ _ * [ ] ( ) ~ ` > # + - = | { } . !
+MARKDOWN_V2_ESCAPES = str.maketrans({char: '\\' + char for char in '\\_*[]()~`>#+-=|{}.!'})
+
+# Callback data of the results page buttons; page flips are
+# "page_<search id>:<page>" and selections "select_<search id>:<page>:<number>"
+PAGE_CALLBACK_PREFIX = "page_"
+SELECT_CALLBACK_PREFIX = "select_"
+RESULTS_EXPIRED_MESSAGE = "These results have expired. Please search again."
+# Release names can be very long; the message lists them in full, so the
+# selection buttons only need enough to tell them apart
+BUTTON_NAME_MAX_LENGTH = 60
+
+# user_data keys holding the results of the current search
+SEARCH_RESULT_KEYS = ("result_pages", "search_page", "torrent_results", "search_id")
+
+# Plain text messages (not commands) are treated as movie searches
+SEARCH_TEXT_FILTER = filters.TEXT & ~filters.COMMAND
+
+# Fixed replies
+WELCOME_MESSAGE = (
+    "Hello! Send me a movie title, and I'll search for movie torrents.\n\n"
+    "This bot is for movies only and does not support TV series.\n\n"
+    "Use /help to see all available commands."
+)
+CANCEL_MESSAGE = "Operation cancelled."
+
+# /help text, assembled once; admins also see the admin commands
+_HELP_COMMANDS = (
+    "<b>🎬 Telegram Plex Movie Bot Help</b>\n\n"
+    "<b>Commands:</b>\n"
+    "/search - Search for a movie (TV series not supported)\n"
+    "/recent - Show recently added movies\n"
+    "/history - Show your search history\n"
+    "/help - Show this help message\n"
+)
+_HELP_ADMIN_COMMANDS = (
+    "\n<b>Admin Commands:</b>\n"
+    "/adduser &lt;user_id&gt; [username] - Add a new user by Telegram ID\n"
+    "/update_plex - Force update the Plex library\n"
+)
+_HELP_USAGE = (
+    "\n<b>How to use:</b>\n"
+    "1. Send a movie title to search for movie torrents\n"
+    "2. Select from the available movie options (sorted by quality score)\n"
+    "3. The bot will download and add it to Plex automatically\n\n"
+    "<b>Features:</b>\n"
+    "• Smart quality ranking: Torrents are automatically ranked by a quality score\n"
+    "• Automatic retry: Failed downloads are retried with exponential backoff\n"
+    "• Size filtering: Only shows torrents within your allowed size limit\n\n"
+    "The bot will notify you when the movie is ready to watch on Plex.\n\n"
+    "<b>Note:</b> This bot is for movies only and does not support TV series."
+)
+HELP_TEXT = _HELP_COMMANDS + _HELP_USAGE
+ADMIN_HELP_TEXT = _HELP_COMMANDS + _HELP_ADMIN_COMMANDS + _HELP_USAGE
+
+# Static keyboard button shared by every results page
+NEW_SEARCH_BUTTON = InlineKeyboardButton("🔄 New Search", callback_data="new_search")
+
+# Download confirmation prompt and its keyboard
+CONFIRM_MESSAGE_TEMPLATE = "<b>Confirm download:</b>\n\n<code>{name}</code>\n\nSize: {size}"
+CONFIRM_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("✅ Yes, download", callback_data="confirm_yes"),
+        InlineKeyboardButton("❌ No, cancel", callback_data="confirm_no")
+    ]
+])
+
 # --- Error Handler Decorator ---
 def async_error_handler(func):
     """
     Decorator to handle exceptions in async functions.
     Logs the exception and sends an appropriate error message to the user.
     """
+    # Function-specific error messages or default ones
+    get_func_error_message = error_message_lookup(func.__name__)
+    
     @wraps(func)
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
         try:
             return await func(update, context, *args, **kwargs)
         except Exception as e:
-            logger.exception(f"Async error in {func.__name__}: {e}")
+            logger.exception("Async error in %s: %s", func.__name__, e)
             
-            # Get function-specific error messages or default ones
-            func_errors = error_messages.get(func.__name__, {})
-            error_msg = func_errors.get(type(e).__name__, error_messages["default"])
+            error_msg = get_func_error_message(e)
             
             # Send error message to user
-            if update.message:
-                await update.message.reply_text(error_msg)
-            elif update.callback_query:
-                await update.callback_query.message.reply_text(error_msg)
+            message = update.effective_message
+            if message:
+                await message.reply_text(error_msg)
             
             # For conversation handlers, return to initial state
             if func.__name__ in ["search_movie", "select_torrent"]:
@@ -107,27 +294,175 @@ def async_error_handler(func):
 
 # --- Helper Functions ---
 
+def parse_torrent_size(raw_size: Any) -> Optional[int]:
+    """Parse a torrent size in bytes, returning None if it isn't a valid number"""
+    if isinstance(raw_size, int):
+        return raw_size
+    if isinstance(raw_size, float):
+        return int(raw_size) if math.isfinite(raw_size) else None
+    # isdecimal() rejects digits such as '²' that int() can't parse
+    if isinstance(raw_size, str) and raw_size.isdecimal():
+        return int(raw_size)
+    return None
+
+def format_size(size_bytes: int) -> str:
+    """Format a byte count in the largest unit it exceeds"""
+    # Pick the unit with integer comparisons and divide only once
+    for unit_size, unit in SIZE_UNITS:
+        if size_bytes > unit_size:
+            break
+    return f"{size_bytes / unit_size:.2f} {unit}"
+
 def format_torrent_message(torrent: Dict[str, Any], idx: int) -> str:
     """Format a single torrent entry for display"""
-    try:
-        size_bytes = int(torrent.get('size', 0))
-        size_mb = size_bytes / (1024 * 1024)
-        size_gb = size_bytes / (1024 * 1024 * 1024)
-        size_str = f"{size_gb:.2f} GB" if size_gb > 1 else f"{size_mb:.2f} MB"
+    name = torrent.get('name', 'Unknown')
+    seeders = torrent.get('seeders', 'N/A')
+    
+    size_bytes = parse_torrent_size(torrent.get('size', 0))
+    if size_bytes is None:
+        logger.warning("Invalid size for torrent %s: %r", name, torrent.get('size'))
+        return f"{idx}. {name} | Size: N/A | Seeds: {seeders}"
+    
+    size_str = format_size(size_bytes)
+    
+    # Include quality score if available
+    quality_score = torrent.get('quality_score')
+    quality_info = f" | Quality: {quality_score:.1f}/25" if isinstance(quality_score, (int, float)) else ""
+    
+    return f"{idx}. {name} | Size: {size_str} | Seeds: {seeders}{quality_info}"
+
+def torrent_button_label(torrent: Dict[str, Any], idx: int) -> str:
+    """Label of a torrent's selection button, with long names shortened"""
+    name = torrent.get('name', 'Unknown')
+    if len(name) > BUTTON_NAME_MAX_LENGTH:
+        name = name[:BUTTON_NAME_MAX_LENGTH - 1] + "…"
+    return f"{idx}. {name}"
+
+def start_background_task(coro: Coroutine) -> asyncio.Task:
+    """
+    Run a coroutine as a background task, keeping a reference until it finishes
+    
+    The event loop only holds weak references to tasks, so an unreferenced
+    download task could otherwise be garbage collected while it is running.
+    The task gets a fresh context so it doesn't carry the spawning update's
+    context variables for its whole lifetime.
+    
+    Args:
+        coro: The coroutine to run
+        
+    Returns:
+        The created task
+    """
+    task = contextvars.Context().run(asyncio.create_task, coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+def invalidate_recent_reply():
+    """Forget the cached /recent reply after the Plex library changed"""
+    global _recent_reply
+    _recent_reply = None
+
+async def request_plex_update(file_path: str) -> str:
+    """
+    Ask for a Plex library scan, sharing it with scans requested around the same time
+    
+    Args:
+        file_path: Path to the added file, or an empty string for all libraries
         
-        # Include quality score if available
-        quality_score = torrent.get('quality_score')
-        quality_info = f" | Quality: {quality_score:.1f}/25" if quality_score is not None else ""
+    Returns:
+        Status message from the Plex update
+    """
+    if plex_update_queue is None:
+        # Worker not running (e.g. outside the application), scan directly
+        message = await asyncio.to_thread(update_plex_library, file_path)
+        invalidate_recent_reply()
+        return message
+    
+    result = asyncio.get_running_loop().create_future()
+    await plex_update_queue.put((file_path, result))
+    return await result
+
+async def plex_update_worker() -> None:
+    """Run queued Plex scans, one per library type for each burst of requests"""
+    while True:
+        pending = [await plex_update_queue.get()]
+        while True:
+            try:
+                pending.append(
+                    await asyncio.wait_for(plex_update_queue.get(), timeout=PLEX_UPDATE_DEBOUNCE)
+                )
+            except asyncio.TimeoutError:
+                break
+        
+        # Group waiters by the library their path maps to; a full scan
+        # (None) covers every library, so it absorbs all other requests
+        scans: Dict[Optional[str], Tuple[str, List[asyncio.Future]]] = {}
+        for file_path, result in pending:
+            library_type = plex_library_type(file_path)
+            scans.setdefault(library_type, (file_path, []))[1].append(result)
+        if None in scans and len(scans) > 1:
+            waiters = [result for _, results in scans.values() for result in results]
+            scans = {None: (scans[None][0], waiters)}
         
-        return f"{idx}. {torrent.get('name', 'Unknown')} | Size: {size_str} | Seeds: {torrent.get('seeders', 'N/A')}{quality_info}"
-    except (ValueError, TypeError) as e:
-        logger.warning(f"Error converting size for torrent {torrent.get('name', 'Unknown')}: {e}")
-        return f"{idx}. {torrent.get('name', 'Unknown')} | Size: N/A | Seeds: {torrent.get('seeders', 'N/A')}"
+        logger.info("🎬 Running %d Plex scan(s) for %d request(s)", len(scans), len(pending))
+        for file_path, results in scans.values():
+            try:
+                message = await asyncio.to_thread(update_plex_library, file_path)
+            except Exception as e:
+                message = f"Plex update failed: {e}"
+            invalidate_recent_reply()
+            for result in results:
+                if not result.done():
+                    result.set_result(message)
+
+async def cached_search(query: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Search for torrents, reusing results of an identical recent search
+    
+    Args:
+        query: The movie title to search for
+        
+    Returns:
+        List of ranked torrent dictionaries or None if the search failed
+    """
+    key = query.casefold().strip()
+    now = time.monotonic()
+    
+    hit = _search_cache.get(key)
+    if hit and now < hit[0]:
+        logger.info("Using cached search results for '%s'", query)
+        torrents = hit[1]
+    else:
+        # Share a search that is already running for the same query
+        # instead of hitting the torrent site again
+        task = _search_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(search_tpb, query))
+            _search_inflight[key] = task
+            task.add_done_callback(lambda _: _search_inflight.pop(key, None))
+        
+        # Shield the shared search so one cancelled caller doesn't cancel it for the others
+        torrents = await asyncio.shield(task)
+        if torrents is None:
+            # Don't cache failed searches
+            return None
+        
+        ttl = SEARCH_CACHE_TTL if torrents else SEARCH_EMPTY_CACHE_TTL
+        _search_cache.pop(key, None)
+        _search_cache[key] = (now + ttl, torrents)
+        if len(_search_cache) > SEARCH_CACHE_MAX_SIZE:
+            # Evict the oldest entry
+            _search_cache.pop(next(iter(_search_cache)))
+    
+    # Hand out copies tagged with this user's query so the cached entries stay untouched
+    return [{**torrent, 'search_query': query} for torrent in torrents]
 
 def create_torrent_pagination(
     all_results: List[Dict[str, Any]], 
     page: int, 
-    items_per_page: int = 5
+    items_per_page: int = 5,
+    search_id: str = ""
 ) -> Tuple[List[Dict[str, Any]], str, InlineKeyboardMarkup]:
     """
     Create pagination for movie torrent results
@@ -136,6 +471,7 @@ def create_torrent_pagination(
         all_results: List of all movie torrent results
         page: Current page number (0-indexed)
         items_per_page: Number of items per page
+        search_id: ID of the search, embedded in the page and selection buttons
         
     Returns:
         Tuple of (current_page_items, message_text, reply_markup)
@@ -144,70 +480,136 @@ def create_torrent_pagination(
     current_page_items = all_results[start_idx:start_idx + items_per_page]
     
     # Create message text
-    message = f"Found {len(all_results)} movie torrents (showing {start_idx + 1}-{start_idx + len(current_page_items)}):\n\n"
-    for idx, torrent in enumerate(current_page_items, start=1):
-        message += format_torrent_message(torrent, idx) + "\n"
+    lines = [f"Found {len(all_results)} movie torrents (showing {start_idx + 1}-{start_idx + len(current_page_items)}):\n"]
+    lines.extend(
+        format_torrent_message(torrent, idx)
+        for idx, torrent in enumerate(current_page_items, start=1)
+    )
+    message = "\n".join(lines) + "\n"
     
     # Create selection buttons
     keyboard = [
-        [InlineKeyboardButton(f"{idx}. {torrent.get('name', 'Unknown')}", callback_data=f"select_{idx}")]
+        [InlineKeyboardButton(torrent_button_label(torrent, idx), callback_data=f"{SELECT_CALLBACK_PREFIX}{search_id}:{page}:{idx}")]
         for idx, torrent in enumerate(current_page_items, start=1)
     ]
     
     # Add navigation row if there are more results
     nav_row = []
     if page > 0:
-        nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data="prev_page"))
+        nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"{PAGE_CALLBACK_PREFIX}{search_id}:{page - 1}"))
     if (page + 1) * items_per_page < len(all_results):
-        nav_row.append(InlineKeyboardButton("Next ➡️", callback_data="next_page"))
+        nav_row.append(InlineKeyboardButton("Next ➡️", callback_data=f"{PAGE_CALLBACK_PREFIX}{search_id}:{page + 1}"))
     if nav_row:
         keyboard.append(nav_row)
         
     # Add search again button
-    keyboard.append([InlineKeyboardButton("🔄 New Search", callback_data="new_search")])
+    keyboard.append([NEW_SEARCH_BUTTON])
     
     return current_page_items, message, InlineKeyboardMarkup(keyboard)
 
+def build_result_pages(
+    all_results: List[Dict[str, Any]], 
+    items_per_page: int = 5,
+    search_id: str = ""
+) -> List[Tuple[List[Dict[str, Any]], str, InlineKeyboardMarkup]]:
+    """
+    Render every page of search results up front so page flips are a lookup
+    
+    Args:
+        all_results: List of all movie torrent results
+        items_per_page: Number of items per page
+        search_id: ID of the search, embedded in the page and selection buttons
+        
+    Returns:
+        List of (current_page_items, message_text, reply_markup) tuples, one per page
+    """
+    page_count = (len(all_results) + items_per_page - 1) // items_per_page
+    return [
+        create_torrent_pagination(all_results, page, items_per_page, search_id)
+        for page in range(page_count)
+    ]
+
 def add_to_search_history(context: ContextTypes.DEFAULT_TYPE, query: str, selected_torrent: Dict = None):
     """Add a search to the user's history"""
-    if 'search_history' not in context.user_data:
-        context.user_data['search_history'] = []
+    history = context.user_data.get('search_history')
+    if history is None:
+        # Bounded deque drops the oldest searches automatically
+        history = context.user_data['search_history'] = deque(maxlen=SEARCH_HISTORY_SIZE)
+    # Latest not yet downloaded entry per query, so a confirmation can mark
+    # it without scanning the history
+    pending = context.user_data.setdefault('history_pending', {})
+    
+    # The deque is about to drop its oldest entry, stop tracking it
+    if len(history) == history.maxlen:
+        oldest = history[0]
+        if pending.get(oldest['query']) is oldest:
+            del pending[oldest['query']]
         
-    # Add new search entry
+    # Add new search entry, formatting the timestamp once for /history
+    timestamp = datetime.now()
     entry = {
         'query': query,
-        'timestamp': datetime.now(),
+        'timestamp': timestamp,
+        'timestamp_str': timestamp.strftime(HISTORY_TIMESTAMP_FORMAT),
         'selected_torrent': selected_torrent,
         'downloaded': False
     }
     
-    history = context.user_data['search_history']
     history.append(entry)
-    
-    # Keep only last 50 searches
-    if len(history) > 50:
-        context.user_data['search_history'] = history[-50:]
+    pending[query] = entry
+
+def format_history_timestamp(entry: Dict[str, Any]) -> str:
+    """Get the display timestamp of a search history entry"""
+    return entry.get('timestamp_str') or entry['timestamp'].strftime(HISTORY_TIMESTAMP_FORMAT)
 
 def mark_history_downloaded(context: ContextTypes.DEFAULT_TYPE, query: str, torrent: Dict):
     """Mark a search history entry as downloaded"""
-    if 'search_history' not in context.user_data:
-        return
+    entry = context.user_data.get('history_pending', {}).pop(query, None)
+    if entry is not None:
+        entry['downloaded'] = True
+        entry['selected_torrent'] = torrent
+
+def clear_search_results(context: ContextTypes.DEFAULT_TYPE):
+    """Drop the search results kept in user data for paging and selection"""
+    for key in SEARCH_RESULT_KEYS:
+        context.user_data.pop(key, None)
+
+def is_current_result_page(context: ContextTypes.DEFAULT_TYPE, search_id: str, page: int) -> bool:
+    """Check that a results button belongs to the current search and one of its pages"""
+    return (
+        search_id == context.user_data.get('search_id')
+        and 0 <= page < len(context.user_data.get('result_pages', ()))
+    )
+
+def cancel_running_search(context: ContextTypes.DEFAULT_TYPE):
+    """Cancel the user's search if it is still running in the background"""
+    task = context.user_data.pop('search_task', None)
+    if task is not None and not task.done():
+        task.cancel()
+
+async def show_results_page(send: Callable[..., Awaitable[Any]], context: ContextTypes.DEFAULT_TYPE) -> int:
+    """
+    Show the current page of the pre-rendered search results
+    
+    Args:
+        send: Coroutine function that sends or edits the results message
+        context: Callback context holding the search results
         
-    history = context.user_data['search_history']
-    # Find the most recent matching search
-    for entry in reversed(history):
-        if entry['query'] == query and not entry['downloaded']:
-            entry['downloaded'] = True
-            entry['selected_torrent'] = torrent
-            break
+    Returns:
+        The next conversation state
+    """
+    page = context.user_data['search_page']
+    current_page_items, message, reply_markup = context.user_data['result_pages'][page]
+    
+    context.user_data["torrent_results"] = current_page_items
+    await send(message, reply_markup=reply_markup)
+    return SELECT
 
 def escape_markdown_v2(text):
     """Escape special characters for Telegram's MarkdownV2 format."""
     if not text:
         return ""
-    # Characters that need to be escaped: _ * [ ] ( ) ~ ` > # + - = | { } . !
-    escape_chars = r'_*[]()~`>#+-=|{}.!'
-    return re.sub(f'([{re.escape(escape_chars)}])', r'\\\1', str(text))
+    return str(text).translate(MARKDOWN_V2_ESCAPES)
 
 # --- Bot Handlers with Error Handler Decorator ---
 
@@ -218,17 +620,14 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
     username = update.effective_user.username or "Unknown"
     
-    # Register user if not exists
+    # Register user if not exists; both calls save the users file, so keep
+    # the disk write off the event loop
     if not user_manager.get_user(user_id):
-        user_manager.add_user(user_id, username)
+        await asyncio.to_thread(user_manager.add_user, user_id, username)
     else:
-        user_manager.update_last_active(user_id)
+        await asyncio.to_thread(user_manager.update_last_active, user_id)
     
-    await update.message.reply_text(
-        "Hello! Send me a movie title, and I'll search for movie torrents.\n\n"
-        "This bot is for movies only and does not support TV series.\n\n"
-        "Use /help to see all available commands."
-    )
+    await update.message.reply_text(WELCOME_MESSAGE)
     return MOVIE
 
 @restricted_access()
@@ -242,65 +641,89 @@ async def search_movie(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         await update.message.reply_text("Please provide a movie title to search for.")
         return MOVIE
     
+    # Every text search starts over, so results and buttons of an earlier
+    # search on screen can't be mixed up with the new one, and a search
+    # still running for an earlier title is dropped
+    cancel_running_search(context)
+    clear_search_results(context)
+    
     # Add to search history
     add_to_search_history(context, movie_title)
     
-    # Show typing indicator while searching
-    await context.bot.send_chat_action(
-        chat_id=update.effective_chat.id,
-        action="typing"
+    logger.info("👤 User %s searching for '%s'", user.username or user.id, movie_title)
+    
+    # Show typing indicator and the status message (edited with the results
+    # once they arrive) in parallel rather than one round-trip after the other
+    _, status_message = await asyncio.gather(
+        context.bot.send_chat_action(
+            chat_id=update.effective_chat.id,
+            action="typing"
+        ),
+        update.message.reply_text("🔍 Searching for movies..."),
     )
     
-    logger.info(f"👤 User {user.username or user.id} searching for '{movie_title}'")
-    status_message = await update.message.reply_text("🔍 Searching for movies...")
+    # The search itself runs in the background so the conversation handler
+    # returns right away; a new title or /cancel cancels it
+    context.user_data['search_task'] = start_background_task(
+        show_search_results(update, context, status_message, movie_title)
+    )
+    return SELECT
+
+async def show_search_results(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                              status_message: Message, movie_title: str) -> None:
+    """
+    Search for a movie and edit the status message with the results
     
+    Args:
+        update: The update that requested the search
+        context: Callback context the results are stored in
+        status_message: The "Searching" message to edit with the results
+        movie_title: The title to search for
+    """
+    user = update.effective_user
     try:
-        if 'search_page' not in context.user_data:
-            # New search
-            # search_tpb will return torrents ranked by quality score (seeds, size, trusted status)
-            torrents = search_tpb(movie_title)
-            if not torrents:
-                logger.info(f"❌ No torrents found for '{movie_title}'")
-                await status_message.edit_text(
-                    f"No movie torrents found for '{movie_title}'.\n"
-                    "Please try another search term."
-                )
-                return MOVIE
-                
-            user_id = update.effective_user.id
-            
-            # Filter torrents based on user's size limit
-            allowed_torrents = [
-                torrent for torrent in torrents 
-                if user_manager.can_access_file_size(user_id, int(torrent.get('size', 0)))
-            ]
-            
-            if not allowed_torrents:
-                logger.info(f"⚠️ User {user.username or user.id} has no torrents within size limit for '{movie_title}'")
-                await update.message.reply_text(
-                    "No suitable movie torrents found within your size limit.\n"
-                    "Try another search or contact an administrator."
-                )
-                return MOVIE
-            
-            # Store all results and current page
-            context.user_data['all_results'] = allowed_torrents
-            context.user_data['search_page'] = 0
+        # search_tpb will return torrents ranked by quality score (seeds, size, trusted status)
+        torrents = await cached_search(movie_title)
+        if not torrents:
+            logger.info("❌ No torrents found for '%s'", movie_title)
+            await status_message.edit_text(
+                f"No movie torrents found for '{movie_title}'.\n"
+                "Please try another search term."
+            )
+            return
             
-            logger.info(f"✅ Found {len(allowed_torrents)} torrents for '{movie_title}' within size limits")
+        # Filter torrents based on user's size limit, looking the limit up once;
+        # torrents without a valid size count as over the limit
+        user_record = user_manager.get_user(user.id)
+        max_file_size = user_record.max_file_size if user_record else -1
+        allowed_torrents = []
+        for torrent in torrents:
+            size_bytes = parse_torrent_size(torrent.get('size', 0))
+            if size_bytes is not None and size_bytes <= max_file_size:
+                allowed_torrents.append(torrent)
         
-        # Get current page of results using the pagination helper
-        page = context.user_data['search_page']
-        all_results = context.user_data['all_results']
+        if not allowed_torrents:
+            logger.info("⚠️ User %s has no torrents within size limit for '%s'", user.username or user.id, movie_title)
+            await status_message.edit_text(
+                "No suitable movie torrents found within your size limit.\n"
+                "Try another search or contact an administrator."
+            )
+            return
         
-        current_page_items, message, reply_markup = create_torrent_pagination(all_results, page)
+        # Store the rendered pages and current page
+        search_id = context.user_data['search_id'] = secrets.token_urlsafe(6)
+        context.user_data['result_pages'] = build_result_pages(allowed_torrents, search_id=search_id)
+        context.user_data['search_page'] = 0
         
-        context.user_data["torrent_results"] = current_page_items
-        await status_message.edit_text(message, reply_markup=reply_markup)
-        return SELECT
+        logger.info("✅ Found %d torrents for '%s' within size limits", len(allowed_torrents), movie_title)
+        
+        await show_results_page(status_message.edit_text, context)
     except Exception as e:
-        logger.error(f"Error searching for movie: {e}")
-        raise  # This will be caught by the error handler decorator
+        logger.exception("Error searching for movie: %s", e)
+        try:
+            await status_message.edit_text(get_search_error_message(e))
+        except Exception as report_error:
+            logger.error("Failed to report search error: %s", report_error)
 
 @check_file_size_limit()
 @rate_limit("select_torrent")
@@ -310,34 +733,39 @@ async def select_torrent_callback(update: Update, context: ContextTypes.DEFAULT_
     query = update.callback_query
     await query.answer()
     
+    data = query.data
+    
     try:
-        if query.data == "next_page" or query.data == "prev_page":
-            # Update page number
-            if query.data == "next_page":
-                context.user_data['search_page'] += 1
-            else:
-                context.user_data['search_page'] -= 1
-            
-            # Get current page of results using the pagination helper
-            page = context.user_data['search_page']
-            all_results = context.user_data['all_results']
-            
-            current_page_items, message, reply_markup = create_torrent_pagination(all_results, page)
-            
-            context.user_data["torrent_results"] = current_page_items
-            await query.edit_message_text(message, reply_markup=reply_markup)
-            return SELECT
-        elif query.data == "new_search":
+        if data.startswith(PAGE_CALLBACK_PREFIX):
+            # Page buttons carry their search ID and target page, so stale
+            # keyboards can't page through newer results
+            search_id, page = data[len(PAGE_CALLBACK_PREFIX):].split(":")
+            page = int(page)
+            if not is_current_result_page(context, search_id, page):
+                await query.edit_message_text(RESULTS_EXPIRED_MESSAGE)
+                return MOVIE
+            # Show the page in the same message
+            context.user_data['search_page'] = page
+            return await show_results_page(query.edit_message_text, context)
+        elif data == "new_search":
             # Clear search data and prompt for new search
-            context.user_data.pop('search_page', None)
-            context.user_data.pop('all_results', None)
+            clear_search_results(context)
             await query.edit_message_text("Please enter a new movie title to search for.")
             return MOVIE
-        elif query.data.startswith('select_'):
-            # Handle torrent selection
-            idx = int(query.data.split('_')[1]) - 1
+        elif data.startswith(SELECT_CALLBACK_PREFIX):
+            # Handle torrent selection; buttons carry the ID of the search and
+            # the page they were built for, so stale keyboards can't pick from
+            # newer results or another page
+            search_id, page, number = data[len(SELECT_CALLBACK_PREFIX):].split(":")
+            page = int(page)
+            if not is_current_result_page(context, search_id, page):
+                await query.edit_message_text(RESULTS_EXPIRED_MESSAGE)
+                return MOVIE
+            context.user_data['search_page'] = page
+            context.user_data['torrent_results'] = context.user_data['result_pages'][page][0]
+            idx = int(number) - 1
             return await handle_torrent_selection(update, context, idx)
-        elif query.data.startswith('confirm_'):
+        elif data.startswith('confirm_'):
             return await handle_confirmation(update, context)
             
     except ValueError:
@@ -360,29 +788,22 @@ async def handle_torrent_selection(update: Update, context: ContextTypes.DEFAULT
     
     selected = torrents[idx]
     context.user_data['selected_torrent'] = selected
+    # The result pages aren't needed past this point
+    clear_search_results(context)
     
-    # Format size in GB
-    size_gb = int(selected['size']) / (1024 * 1024 * 1024)
-    size_formatted = f"{size_gb:.2f}"
+    # Format the size the same way as on the result buttons
+    size_bytes = parse_torrent_size(selected.get('size'))
+    size_formatted = format_size(size_bytes) if size_bytes is not None else "N/A"
     
-    logger.info(f"👤 User {user.username or user.id} selected torrent: {selected['name']} ({size_formatted} GB)")
+    logger.info("👤 User %s selected torrent: %s (%s)", user.username or user.id, selected['name'], size_formatted)
     
     # Create confirmation message
-    safe_name = html.escape(selected['name'])
-    confirm_message = (
-        f"<b>Confirm download:</b>\n\n<code>{safe_name}</code>\n\nSize: {size_formatted} GB"
-    )
+    confirm_message = CONFIRM_MESSAGE_TEMPLATE.format_map({
+        'name': html.escape(selected['name']),
+        'size': size_formatted,
+    })
     
-    # Create keyboard for confirmation
-    keyboard = [
-        [
-            InlineKeyboardButton("✅ Yes, download", callback_data="confirm_yes"),
-            InlineKeyboardButton("❌ No, cancel", callback_data="confirm_no")
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await query.edit_message_text(confirm_message, reply_markup=reply_markup, parse_mode='HTML')
+    await query.edit_message_text(confirm_message, reply_markup=CONFIRM_KEYBOARD, parse_mode='HTML')
     return CONFIRM
 
 @async_error_handler
@@ -399,8 +820,11 @@ async def handle_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         return ConversationHandler.END
         
+    if query.data in ("confirm_yes", "confirm_no"):
+        context.user_data.pop('selected_torrent', None)
+    
     if query.data == "confirm_no":
-        logger.info(f"👤 User {user.username or user.id} cancelled download of: {selected['name']}")
+        logger.info("👤 User %s cancelled download of: %s", user.username or user.id, selected['name'])
         await query.edit_message_text(
             "Download cancelled.\n"
             "You can search for another movie or select a different option."
@@ -416,71 +840,149 @@ async def handle_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE
             parse_mode='Markdown'
         )
         
-        logger.info(f"👤 User {user.username or user.id} confirmed download of: {selected['name']}")
-        info_hash = add_torrent(selected)
+        logger.info("👤 User %s confirmed download of: %s", user.username or user.id, selected['name'])
+        # Add the torrent in the background so the callback is done with
+        # before qBittorrent gets a chance to stall it
+        start_background_task(add_and_process_torrent(update, context, selected))
+        return ConversationHandler.END
         
-        if info_hash:
-            # Mark as downloaded in history
-            mark_history_downloaded(
-                context,
-                selected.get('search_query', ''),
-                selected
-            )
-            
+    return CONFIRM
+
+@async_error_handler
+async def add_and_process_torrent(update: Update, context: ContextTypes.DEFAULT_TYPE, selected: dict):
+    """Add the confirmed torrent to qBittorrent once it is its turn and start processing it"""
+    query = update.callback_query
+    chat_id = update.effective_chat.id
+    
+    async with AsyncExitStack() as stack:
+        # Adding the torrent starts the download, so wait for the turn first
+        if download_turn_is_taken(chat_id):
             await query.edit_message_text(
-                f"✅ Torrent added successfully!\n\n"
-                f"Movie: `{selected['name']}`\n"
-                f"Status: Monitoring download...",
+                f"⏳ Queued:\n"
+                f"`{selected['name']}`\n\n"
+                "The download starts once earlier downloads are done.",
                 parse_mode='Markdown'
             )
-            asyncio.create_task(process_torrent(update, context, selected, info_hash))
-        else:
-            logger.error(f"❌ Failed to add torrent: {selected['name']}")
+        await stack.enter_async_context(download_turn(chat_id))
+        
+        info_hash = await asyncio.to_thread(add_torrent, selected)
+        if not info_hash:
+            logger.error("❌ Failed to add torrent: %s", selected['name'])
             await query.edit_message_text(
                 f"❌ Failed to add torrent.\n\n"
                 f"Movie: `{selected['name']}`\n"
                 f"Please try again or choose another torrent.",
                 parse_mode='Markdown'
             )
-        return ConversationHandler.END
+            return
         
-    return CONFIRM
+        # Mark as downloaded in history
+        mark_history_downloaded(
+            context,
+            selected.get('search_query', ''),
+            selected
+        )
+        
+        await query.edit_message_text(
+            f"✅ Torrent added successfully!\n\n"
+            f"Movie: `{selected['name']}`\n"
+            f"Status: Monitoring download...",
+            parse_mode='Markdown'
+        )
+        # The turn passes on to the processing task and ends with it
+        turn = stack.pop_all()
+    
+    # Pass on only what the download needs, so no frame of the download task,
+    # which may run for hours, keeps the update and context alive
+    start_background_task(process_torrent_in_turn(
+        turn,
+        context.bot,
+        chat_id,
+        update.effective_user.username or update.effective_user.id,
+        selected,
+        info_hash
+    ))
 
-@async_error_handler
-async def process_torrent(update: Update, context: ContextTypes.DEFAULT_TYPE, selected: dict, info_hash: str):
-    """Process the torrent download, extraction, and Plex update"""
-    user = update.effective_user
+def download_turn_is_taken(chat_id: int) -> bool:
+    """Check whether a new download from the chat would have to wait for its turn"""
+    return chat_id in _chat_download_locks or (_download_slots is not None and _download_slots.locked())
+
+@asynccontextmanager
+async def download_turn(chat_id: int):
+    """Wait until earlier downloads from the same chat are done and a download slot is free"""
+    global _download_slots
+    if _download_slots is None:
+        # Created lazily so it belongs to the running event loop
+        _download_slots = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+    chat_lock, pending = _chat_download_locks.get(chat_id, (None, 0))
+    if chat_lock is None:
+        chat_lock = asyncio.Lock()
+    _chat_download_locks[chat_id] = (chat_lock, pending + 1)
+    
     try:
-        # Store the status message in context for updating
-        status_message = await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="⏳ Initializing download..."
+        async with chat_lock, _download_slots:
+            yield
+    finally:
+        chat_lock, pending = _chat_download_locks[chat_id]
+        if pending > 1:
+            _chat_download_locks[chat_id] = (chat_lock, pending - 1)
+        else:
+            del _chat_download_locks[chat_id]
+
+async def process_torrent_in_turn(turn: AsyncExitStack, bot: Bot, chat_id: int, requested_by: Any, selected: dict, info_hash: str):
+    """Process an added torrent, ending the download turn it was added in once done"""
+    async with turn:
+        await process_torrent(bot, chat_id, requested_by, selected, info_hash)
+
+async def process_torrent(bot: Bot, chat_id: int, requested_by: Any, selected: dict, info_hash: str):
+    """
+    Process the torrent download, extraction, and Plex update
+    
+    Runs without the update, so it reports its own errors to the chat
+    instead of relying on async_error_handler.
+    
+    Args:
+        bot: Bot used to send the status messages
+        chat_id: Chat that requested the download
+        requested_by: Username or ID of the requesting user, for the admins
+        selected: The torrent being downloaded
+        info_hash: The torrent's info hash in qBittorrent
+    """
+    # Latest background status edit, see show_progress and show_stage below
+    stage_edit: Optional[asyncio.Task] = None
+    
+    try:
+        # Send a status message that gets edited as the download progresses
+        status_message = await bot.send_message(
+            chat_id=chat_id,
+            text=f"⏳ Downloading: {selected['name']}\n"
+                 "Please wait..."
         )
         
-        # Update progress periodically
-        async def update_progress():
-            progress_indicators = ["⏳", "⌛"]
-            i = 0
-            while True:
-                try:
-                    await status_message.edit_text(
-                        f"{progress_indicators[i]} Downloading: {selected['name']}\n"
-                        "Please wait..."
-                    )
-                    i = (i + 1) % 2
-                    await asyncio.sleep(3)
-                except Exception:
-                    break
-
-        # Start progress updates in background
-        progress_task = asyncio.create_task(update_progress())
+        # Edit the status message once per 10% of progress rather than
+        # animating it, so a long download costs only a handful of edits.
+        # The edits are fire-and-forget like the stage edits below, so a flood
+        # wait never stalls the monitoring; a step is skipped while the last
+        # edit is still waiting, and an edit hitting flood control is dropped
+        async def edit_progress(percent: int) -> None:
+            try:
+                await status_message.edit_text(
+                    f"⏳ Downloading: {selected['name']}\n"
+                    f"{percent}% complete"
+                )
+            except RetryAfter as e:
+                logger.warning("⚠️ Skipped %d%% progress update for %s, flood control asks to wait %ss", percent, selected['name'], e.retry_after)
+            except Exception as e:
+                logger.warning("Error reporting download progress: %s", e)
+        
+        async def show_progress(percent: int) -> None:
+            nonlocal stage_edit
+            if stage_edit is None or stage_edit.done():
+                stage_edit = start_background_task(edit_progress(percent))
         
         # Monitor the download with retry capability
-        logger.info(f"🔄 Starting download monitoring for {selected['name']} (hash: {info_hash})")
-        download_success = await retry_download(info_hash)
-        
-        # Cancel progress updates
-        progress_task.cancel()
+        logger.info("🔄 Starting download monitoring for %s (hash: %s)", selected['name'], info_hash)
+        download_success = await retry_download(info_hash, on_progress=show_progress)
         
         if not download_success:
             error_msg = (
@@ -491,52 +993,83 @@ async def process_torrent(update: Update, context: ContextTypes.DEFAULT_TYPE, se
                 "• Insufficient disk space\n"
                 "Please try another torrent or search again."
             )
-            logger.error(f"❌ Download failed for {selected['name']} (hash: {info_hash})")
-            await status_message.edit_text(error_msg)
-            await send_notification(update, context, error_msg)
+            logger.error("❌ Download failed for %s (hash: %s)", selected['name'], info_hash)
+            # Let a pending progress edit land first so it can't overwrite the failure
+            if stage_edit is not None:
+                await asyncio.gather(stage_edit, return_exceptions=True)
+            await asyncio.gather(
+                status_message.edit_text(error_msg),
+                send_notification(message=error_msg, chat_id=chat_id, bot=bot),
+            )
             return
 
+        # Intermediate stage edits are fire-and-forget; each one waits for the
+        # previous so they land in order, and the final edit waits for the last
+        def show_stage(text: str) -> None:
+            nonlocal stage_edit
+            previous = stage_edit
+
+            async def edit_stage() -> None:
+                if previous is not None:
+                    await asyncio.gather(previous, return_exceptions=True)
+                await status_message.edit_text(text)
+
+            stage_edit = start_background_task(edit_stage())
+
         # Update status for unpacking
-        logger.info(f"📦 Processing downloaded files for {selected['name']}")
-        await status_message.edit_text("📦 Processing downloaded files...")
+        logger.info("📦 Processing downloaded files for %s", selected['name'])
+        show_stage("📦 Processing downloaded files...")
         file_path = f"downloads/{selected['name']}"
-        new_path = unpack_download_if_needed(file_path)
+        new_path = await asyncio.to_thread(unpack_download_if_needed, file_path)
         final_path = new_path if new_path else file_path
 
         # Update status for Plex
-        logger.info(f"🎬 Adding {selected['name']} to Plex library")
-        await status_message.edit_text("🎬 Adding to Plex library...")
-        plex_message = update_plex_library(final_path)
+        logger.info("🎬 Adding %s to Plex library", selected['name'])
+        show_stage("🎬 Adding to Plex library...")
+        plex_message = await request_plex_update(final_path)
+        await asyncio.gather(stage_edit, return_exceptions=True)
         
         # Final success message
         success_message = (
             f"✅ Movie '{selected['name']}' is now on Plex!\n"
             f"{plex_message}"
         )
-        logger.info(f"✅ Successfully added {selected['name']} to Plex")
-        await status_message.edit_text(success_message)
-        await send_notification(update, context, success_message)
+        logger.info("✅ Successfully added %s to Plex", selected['name'])
         
         # Notify admins about the successful download
         admin_message = (
             f"✅ New movie added to Plex\n"
             f"Title: {selected['name']}\n"
-            f"Added by: {user.username or user.id}"
+            f"Added by: {requested_by}"
+        )
+        # The final status edit and notifications are independent, send them together
+        await asyncio.gather(
+            status_message.edit_text(success_message),
+            send_notification(message=success_message, chat_id=chat_id, bot=bot),
+            notify_admins(admin_message, bot=bot),
         )
-        await notify_admins(admin_message)
         
     except Exception as e:
-        logger.error(f"Error processing torrent: {e}")
-        if 'status_message' in locals():
-            await status_message.edit_text(
-                f"❌ An error occurred while processing '{selected['name']}'"
-            )
-        raise
+        logger.exception("Error processing torrent %s: %s", selected['name'], e)
+        try:
+            if 'status_message' in locals():
+                # Let a pending stage edit land first so it can't overwrite the error
+                if stage_edit is not None:
+                    await asyncio.gather(stage_edit, return_exceptions=True)
+                await status_message.edit_text(
+                    f"❌ An error occurred while processing '{selected['name']}'"
+                )
+            await bot.send_message(chat_id=chat_id, text=get_process_torrent_error_message(e))
+        except Exception as report_error:
+            logger.error("Failed to report torrent processing error: %s", report_error)
 
 @async_error_handler
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel the current operation"""
-    await update.message.reply_text("Operation cancelled.")
+    cancel_running_search(context)
+    clear_search_results(context)
+    context.user_data.pop('selected_torrent', None)
+    await update.message.reply_text(CANCEL_MESSAGE)
     return ConversationHandler.END
 
 @restricted_access()
@@ -545,7 +1078,7 @@ async def update_plex_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     """Manually update the Plex library"""
     logger.info("Received command to update Plex library.")
     await update.message.reply_text("Updating Plex library...")
-    plex_message = update_plex_library("")  # Pass an empty string if not needed
+    plex_message = await request_plex_update("")  # Empty path scans all libraries
     await update.message.reply_text(plex_message)
 
 @async_error_handler
@@ -554,36 +1087,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_id = update.effective_user.id
     is_admin = security.is_admin(user_id)
     
-    help_text = (
-        "<b>🎬 Telegram Plex Movie Bot Help</b>\n\n"
-        "<b>Commands:</b>\n"
-        "/search - Search for a movie (TV series not supported)\n"
-        "/recent - Show recently added movies\n"
-        "/history - Show your search history\n"
-        "/help - Show this help message\n"
-    )
-    
-    # Add admin commands if the user is an admin
-    if is_admin:
-        admin_help = (
-            "\n<b>Admin Commands:</b>\n"
-            "/adduser &lt;user_id&gt; [username] - Add a new user by Telegram ID\n"
-            "/update_plex - Force update the Plex library\n"
-        )
-        help_text += admin_help
-    
-    help_text += (
-        "\n<b>How to use:</b>\n"
-        "1. Send a movie title to search for movie torrents\n"
-        "2. Select from the available movie options (sorted by quality score)\n"
-        "3. The bot will download and add it to Plex automatically\n\n"
-        "<b>Features:</b>\n"
-        "• Smart quality ranking: Torrents are automatically ranked by a quality score\n"
-        "• Automatic retry: Failed downloads are retried with exponential backoff\n"
-        "• Size filtering: Only shows torrents within your allowed size limit\n\n"
-        "The bot will notify you when the movie is ready to watch on Plex.\n\n"
-        "<b>Note:</b> This bot is for movies only and does not support TV series."
-    )
+    help_text = ADMIN_HELP_TEXT if is_admin else HELP_TEXT
     await update.message.reply_text(help_text, parse_mode='HTML')
 
 @rate_limit("recent")
@@ -591,22 +1095,28 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 @async_error_handler
 async def recent_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show recently added movies to Plex"""
+    global _recent_reply
+    if _recent_reply and time.monotonic() - _recent_reply[0] < RECENT_CACHE_TTL:
+        await update.message.reply_text(_recent_reply[1], parse_mode='HTML')
+        return
+    
     await update.message.reply_text("Fetching recent movies from Plex...")
     
-    recent_movies = get_recent_movies(limit=10)
+    recent_movies = await asyncio.to_thread(get_recent_movies, limit=10)
     if not recent_movies:
         await update.message.reply_text("No recent movies found or unable to connect to Plex.")
         return
         
-    message = "🎬 *Recently Added Movies* 🎬\n\n"
+    parts = ["🎬 *Recently Added Movies* 🎬\n\n"]
     for movie in recent_movies:
         title = html.escape(movie.title)
         year = movie.year if hasattr(movie, 'year') else 'N/A'
         added = movie.addedAt.strftime("%Y-%m-%d") if hasattr(movie, 'addedAt') else 'Unknown'
         
-        message += f"🎥 <b>{title}</b> ({year})\n"
-        message += f"📅 Added: {added}\n\n"
+        parts.append(f"🎥 <b>{title}</b> ({year})\n📅 Added: {added}\n\n")
     
+    message = "".join(parts)
+    _recent_reply = (time.monotonic(), message)
     await update.message.reply_text(message, parse_mode='HTML')
 
 @rate_limit("history")
@@ -619,37 +1129,38 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
         
     history = context.user_data['search_history']
-    message = "<b>📖 Your Recent Searches</b>\n\n"
+    parts = ["<b>📖 Your Recent Searches</b>\n\n"]
     
-    for idx, entry in enumerate(reversed(history[-10:]), start=1):  # Show last 10 searches
+    for idx, entry in enumerate(islice(reversed(history), HISTORY_DISPLAY_SIZE), start=1):  # Show last 10 searches
         query = html.escape(entry['query'])
-        timestamp = entry['timestamp'].strftime("%Y-%m-%d %H:%M")
+        timestamp = format_history_timestamp(entry)
         
-        message += f"{idx}. <b>{query}</b>\n📅 {timestamp}\n"
+        parts.append(f"{idx}. <b>{query}</b>\n📅 {timestamp}\n")
         
         if entry.get('downloaded'):
             torrent_name = entry.get('selected_torrent', {}).get('name', 'Unknown')
             safe_name = html.escape(torrent_name)
-            message += f"✅ Downloaded: <code>{safe_name}</code>\n\n"
+            parts.append(f"✅ Downloaded: <code>{safe_name}</code>\n\n")
         else:
-            message += f"❌ Not downloaded\n\n"
+            parts.append("❌ Not downloaded\n\n")
     
-    message += "<i>Use /search_again &lt;number&gt; to repeat a search</i>"
+    parts.append("<i>Use /search_again &lt;number&gt; to repeat a search</i>")
+    message = "".join(parts)
     
     try:
         await update.message.reply_text(message, parse_mode='HTML')
     except Exception as e:
-        logging.error(f"Error sending message: {e}")
+        logging.error("Error sending message: %s", e)
         # Fallback to plain text if HTML fails
-        plain_message = "Your recent searches:\n\n"
-        for idx, entry in enumerate(reversed(history[-10:]), start=1):
-            plain_message += f"{idx}. {entry['query']} - {entry['timestamp'].strftime('%Y-%m-%d %H:%M')}\n"
+        plain_parts = ["Your recent searches:\n\n"]
+        for idx, entry in enumerate(islice(reversed(history), HISTORY_DISPLAY_SIZE), start=1):
+            plain_parts.append(f"{idx}. {entry['query']} - {format_history_timestamp(entry)}\n")
             if entry.get('downloaded'):
                 torrent_name = entry.get('selected_torrent', {}).get('name', 'Unknown')
-                plain_message += f"✅ Downloaded: {torrent_name}\n\n"
+                plain_parts.append(f"✅ Downloaded: {torrent_name}\n\n")
             else:
-                plain_message += f"❌ Not downloaded\n\n"
-        await update.message.reply_text(plain_message)
+                plain_parts.append("❌ Not downloaded\n\n")
+        await update.message.reply_text("".join(plain_parts))
 
 @async_error_handler
 async def search_again_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -663,15 +1174,15 @@ async def search_again_command(update: Update, context: ContextTypes.DEFAULT_TYP
         idx = int(args[0]) - 1
         history = context.user_data.get('search_history', [])
         
-        if not history or idx < 0 or idx >= len(history[-10:]):
+        if not history or idx < 0 or idx >= min(len(history), HISTORY_DISPLAY_SIZE):
             await update.message.reply_text(
                 "Invalid search number.\n"
                 "Use /history to see available searches."
             )
             return ConversationHandler.END
             
-        # Get the search query from history
-        search_entry = list(reversed(history[-10:]))[idx]
+        # Get the search query from history (index 0 is the most recent search)
+        search_entry = history[-1 - idx]
         query = search_entry['query']
         
         # Perform the search again
@@ -699,7 +1210,7 @@ async def search_again_command(update: Update, context: ContextTypes.DEFAULT_TYP
 async def add_user_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Add a new user to the bot by their Telegram ID. Admin only command."""
     user_id = update.effective_user.id
-    logger.info(f"Admin {user_id} is attempting to add a new user")
+    logger.info("Admin %s is attempting to add a new user", user_id)
     
     # Check if the command has the correct format
     if not context.args or len(context.args) < 1:
@@ -717,37 +1228,85 @@ async def add_user_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         username = context.args[1] if len(context.args) > 1 else "Unknown"
         
         # Add the user
-        user = user_manager.add_user(new_user_id, username, UserRole.USER)
+        user = await asyncio.to_thread(user_manager.add_user, new_user_id, username, UserRole.USER)
         
         await update.message.reply_text(
             f"✅ User added successfully!\n"
             f"ID: {new_user_id}\n"
             f"Username: {username}\n"
             f"Role: {user.role.value}\n"
-            f"Max file size: {user.max_file_size / (1024**3):.2f} GB"
+            f"Max file size: {user.max_file_size / GB:.2f} GB"
         )
         
-        logger.info(f"Admin {user_id} added new user {new_user_id} ({username})")
+        logger.info("Admin %s added new user %s (%s)", user_id, new_user_id, username)
     except ValueError:
         await update.message.reply_text("⚠️ Invalid user ID. Please provide a valid numeric Telegram ID.")
     except Exception as e:
-        logger.error(f"Error adding user: {e}")
+        logger.error("Error adding user: %s", e)
         await update.message.reply_text(f"❌ Error adding user: {str(e)}")
 
+async def post_init(application: Application) -> None:
+    """Prepare the event loop once the application is initialized"""
+    # Bound the worker threads used by asyncio.to_thread for the blocking
+    # search, qBittorrent, unpacking and Plex calls
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=IO_WORKER_THREADS, thread_name_prefix="bot-io")
+    )
+    
+    global plex_update_queue
+    plex_update_queue = asyncio.Queue()
+    start_background_task(plex_update_worker())
+
+async def post_shutdown(application: Application) -> None:
+    """Stop background tasks that are still running when the bot shuts down"""
+    if background_tasks:
+        logger.info("Cancelling %d background task(s)", len(background_tasks))
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+
 def main() -> None:
     """Initialize and start the bot"""
-    # Initialize bot with token
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    # Use uvloop's faster event loop when it's installed (not available on Windows)
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            logger.info("Using uvloop event loop")
+        except ImportError:
+            logger.info("uvloop not installed, using the default asyncio event loop")
+    
+    # Initialize bot with token; process a bounded number of updates
+    # concurrently so one slow search or download doesn't hold up every other
+    # chat, and throttle outgoing calls to stay within Telegram's limits
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(MAX_CONCURRENT_UPDATES)
+        .rate_limiter(AIORateLimiter(overall_max_rate=30, max_retries=3))
+        .connection_pool_size(CONNECTION_POOL_SIZE)
+        .connect_timeout(10)
+        .pool_timeout(5)
+        .get_updates_connect_timeout(10)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
-    # Create conversation handler for the main flow
+    # Create conversation handler for the main flow; the search handler is
+    # both an entry point and the MOVIE state handler, so build it once.
+    # Conversation callbacks block, so the state is always settled before
+    # the user's next update and none is dropped; slow work (searching,
+    # downloading) runs in background tasks instead
+    search_handler = MessageHandler(SEARCH_TEXT_FILTER, search_movie)
     conv_handler = ConversationHandler(
         entry_points=[
             CommandHandler("start", start),
             CommandHandler("search_again", search_again_command),
-            MessageHandler(filters.TEXT & ~filters.COMMAND, search_movie),
+            search_handler,
         ],
         states={
-            MOVIE: [MessageHandler(filters.TEXT & ~filters.COMMAND, search_movie)],
+            MOVIE: [search_handler],
             SELECT: [CallbackQueryHandler(select_torrent_callback)],
             CONFIRM: [CallbackQueryHandler(handle_confirmation)],
         },
@@ -759,16 +1318,37 @@ def main() -> None:
     application.add_handler(conv_handler)
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("history", history_command))
-    application.add_handler(CommandHandler("update_plex", update_plex_command))
-    application.add_handler(CommandHandler("recent", recent_command))
+    # The Plex commands wait on Plex and don't touch the conversation, so
+    # they don't hold an update slot while they wait
+    application.add_handler(CommandHandler("update_plex", update_plex_command, block=False))
+    application.add_handler(CommandHandler("recent", recent_command, block=False))
     application.add_handler(CommandHandler("adduser", add_user_command))
 
     # Start the bot with proper error handling
     try:
         logger.info("🚀 Starting Telegram Plex Bot...")
-        application.run_polling(allowed_updates=Update.ALL_TYPES)
+        if USE_WEBHOOK:
+            if not WEBHOOK_URL:
+                raise ValueError("USE_WEBHOOK is set but WEBHOOK_URL is not")
+            logger.info("🌐 Receiving updates via webhook on port %s", WEBHOOK_PORT)
+            application.run_webhook(
+                listen="0.0.0.0",
+                port=WEBHOOK_PORT,
+                url_path=TELEGRAM_BOT_TOKEN,
+                webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{TELEGRAM_BOT_TOKEN}",
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=ALLOWED_UPDATES,
+                drop_pending_updates=True,
+            )
+        else:
+            application.run_polling(
+                timeout=POLLING_TIMEOUT,
+                read_timeout=5,
+                allowed_updates=ALLOWED_UPDATES,
+                drop_pending_updates=True,
+            )
     except Exception as e:
-        logger.error(f"Error starting bot: {e}")
+        logger.error("Error starting bot: %s", e)
         raise
 
 if __name__ == '__main__':
@@ -3,10 +3,12 @@ import qbittorrentapi
 from config import QBITTORRENT_HOST, QBITTORRENT_USERNAME, QBITTORRENT_PASSWORD
 import json
 import asyncio
+import threading
 import time
 import logging
 from functools import wraps
-from typing import Dict, List, Optional, Any, Union
+from operator import itemgetter
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Union
 
 # Set up logging for this module
 logger = logging.getLogger(__name__)
@@ -26,6 +28,25 @@ def error_handler(func):
             return None
     return wrapper
 
+# One HTTP session per worker thread, so repeated searches reuse the keep-alive
+# connection; requests sessions aren't safe to share between threads
+_thread_local = threading.local()
+
+def get_http_session() -> requests.Session:
+    """Return the calling thread's HTTP session, creating it on first use"""
+    session = getattr(_thread_local, "http_session", None)
+    if session is None:
+        session = _thread_local.http_session = requests.Session()
+    return session
+
+# Name fragments that mark a search result as a TV series
+TV_SERIES_PATTERNS = ("s01", "s02", "s03", "season", "episode", "e01", "e02", "complete series")
+
+# qBittorrent reports this ETA when it can't estimate one
+QB_UNKNOWN_ETA = 8640000
+# Longest pause between progress checks while a download is far from done
+MAX_POLL_INTERVAL = 60  # seconds
+
 # Initialize qBittorrent client
 try:
     qb = qbittorrentapi.Client(
@@ -62,7 +83,7 @@ def search_tpb(query: str) -> Optional[List[Dict[str, Any]]]:
     
     try:
         logger.info(f"Searching for: {query}")
-        response = requests.get(url, timeout=10)
+        response = get_http_session().get(url, timeout=10)
         response.raise_for_status()
 
         # Parse JSON response
@@ -78,6 +99,7 @@ def search_tpb(query: str) -> Optional[List[Dict[str, Any]]]:
             
             # Filter out invalid torrents, TV series, and add magnet links
             valid_torrents = []
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
             for torrent in torrents:
                 if not isinstance(torrent, dict) or "info_hash" not in torrent:
                     logger.warning(f"Invalid torrent data: {torrent}")
@@ -85,7 +107,7 @@ def search_tpb(query: str) -> Optional[List[Dict[str, Any]]]:
                 
                 # Skip torrents that look like TV series
                 name = torrent.get("name", "").lower()
-                if any(tv_pattern in name for tv_pattern in ["s01", "s02", "s03", "season", "episode", "e01", "e02", "complete series"]):
+                if any(tv_pattern in name for tv_pattern in TV_SERIES_PATTERNS):
                     logger.debug(f"Skipping TV series: {name}")
                     continue
                 
@@ -102,7 +124,8 @@ def search_tpb(query: str) -> Optional[List[Dict[str, Any]]]:
                 )
                 
                 valid_torrents.append(torrent)
-                logger.debug(f"Found valid torrent: {torrent.get('name')} | Seeds: {torrent.get('seeders')} | Size: {int(torrent.get('size', 0)) / (1024**3):.2f} GB")
+                if debug_enabled:
+                    logger.debug(f"Found valid torrent: {torrent.get('name')} | Seeds: {torrent.get('seeders')} | Size: {int(torrent.get('size', 0)) / (1024**3):.2f} GB")
             
             logger.info(f"Found {len(valid_torrents)} movie torrents after filtering")    
             # Rank torrents by quality score before returning
@@ -155,10 +178,26 @@ def add_torrent(torrent: Dict[str, Any]) -> Optional[str]:
         logger.error(f"qBittorrent API Error: {e}")
         return None
 
+def next_poll_interval(eta_seconds: Any, poll_interval: float) -> float:
+    """
+    Works out how long to wait before checking a download again.
+    
+    Args:
+        eta_seconds: qBittorrent's ETA for the torrent
+        poll_interval: Shortest time between checks (seconds)
+        
+    Returns:
+        Half the remaining ETA, clamped between poll_interval and MAX_POLL_INTERVAL
+    """
+    if not isinstance(eta_seconds, int) or eta_seconds >= QB_UNKNOWN_ETA:
+        return poll_interval
+    return min(max(poll_interval, eta_seconds / 2), MAX_POLL_INTERVAL)
+
 async def monitor_download(
     info_hash: str, 
     timeout: int = 1800, 
-    poll_interval: int = 10
+    poll_interval: int = 10,
+    on_progress: Optional[Callable[[int], Awaitable[None]]] = None
 ) -> bool:
     """
     Monitors the download progress of a torrent.
@@ -167,6 +206,8 @@ async def monitor_download(
         info_hash: The info hash of the torrent to monitor
         timeout: Maximum time to wait for download (seconds)
         poll_interval: How often to check progress (seconds)
+        on_progress: Optional coroutine function called with the progress
+            percentage each time the download crosses a 10% step
         
     Returns:
         True if download completed successfully, False otherwise
@@ -185,9 +226,10 @@ async def monitor_download(
     try:
         last_logged_progress = -1
         last_logged_state = None
+        last_reported_progress = 0
         
         while time.time() - start_time < timeout:
-            torrents_list = qb.torrents_info(torrent_hashes=info_hash)
+            torrents_list = await asyncio.to_thread(qb.torrents_info, torrent_hashes=info_hash)
             
             if not torrents_list:
                 logger.warning(f"Torrent {info_hash} not found in qBittorrent")
@@ -202,17 +244,26 @@ async def monitor_download(
             if current_progress_tens > last_logged_progress or torrent.state != last_logged_state:
                 download_speed = torrent.dlspeed / (1024**2)  # Convert to MB/s
                 eta_seconds = torrent.eta
-                eta_str = f"{eta_seconds // 3600}h {(eta_seconds % 3600) // 60}m {eta_seconds % 60}s" if eta_seconds < 8640000 else "Unknown"
+                eta_str = f"{eta_seconds // 3600}h {(eta_seconds % 3600) // 60}m {eta_seconds % 60}s" if eta_seconds < QB_UNKNOWN_ETA else "Unknown"
                 
                 logger.info(f"Download progress: {progress:.1f}% | Speed: {download_speed:.2f} MB/s | ETA: {eta_str} | State: {torrent.state}")
                 last_logged_progress = current_progress_tens
                 last_logged_state = torrent.state
             
+            # Report each 10% step, the finished download is reported by the caller
+            if on_progress and last_reported_progress < current_progress_tens < 10:
+                last_reported_progress = current_progress_tens
+                try:
+                    await on_progress(current_progress_tens * 10)
+                except Exception as e:
+                    # A failed progress report shouldn't stop the monitoring
+                    logger.warning(f"Error reporting download progress: {e}")
+            
             # Check if download is complete
             if progress >= 99.0:
                 try:
                     # Remove torrent but keep files
-                    qb.torrents_delete(torrent_hashes=info_hash, deleteFiles=False)
+                    await asyncio.to_thread(qb.torrents_delete, torrent_hashes=info_hash, deleteFiles=False)
                     logger.info(f"Download complete! Torrent {info_hash} removed from qBittorrent.")
                     return True
                 except Exception as e:
@@ -220,7 +271,7 @@ async def monitor_download(
                     # Still return True as download completed
                     return True
                     
-            await asyncio.sleep(poll_interval)
+            await asyncio.sleep(next_poll_interval(torrent.eta, poll_interval))
             
         # Timeout reached
         logger.warning(f"Download monitoring timed out after {timeout} seconds")
@@ -230,11 +281,11 @@ async def monitor_download(
         logger.error(f"Error monitoring download: {e}")
         return False
 
-async def retry_download(info_hash, max_attempts=3, retry_delay=30):
+async def retry_download(info_hash, max_attempts=3, retry_delay=30, on_progress=None):
     """Retry failed downloads with exponential backoff"""
     for attempt in range(max_attempts):
         logger.info(f"Download attempt {attempt+1}/{max_attempts} for {info_hash}")
-        if await monitor_download(info_hash):
+        if await monitor_download(info_hash, on_progress=on_progress):
             logger.info(f"Download successful on attempt {attempt+1}")
             return True
         
@@ -248,6 +299,7 @@ async def retry_download(info_hash, max_attempts=3, retry_delay=30):
 
 def rank_torrents(torrents):
     """Rank torrents by a quality score (seeds, size, trusted status)"""
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
     for torrent in torrents:
         # Calculate quality score based on multiple factors
         seeders = int(torrent.get('seeders', 0))
@@ -270,12 +322,14 @@ def rank_torrents(torrents):
         torrent['quality_score'] = min(raw_score, 25)  # Ensure score never exceeds 25
         
         # Log detailed scoring for debugging
-        logger.debug(f"Scoring: {torrent.get('name', 'Unknown')}")
-        logger.debug(f"  Seeds: {seeders}, Leechers: {leechers}, Ratio: {seed_ratio:.2f}, Seed Score: {seed_score:.1f}")
-        logger.debug(f"  Size: {size_gb:.2f} GB, Size Score: {size_score:.1f}")
-        logger.debug(f"  Trusted: {torrent.get('status') == 'trusted'}, Trusted Score: {trusted_score}")
-        logger.debug(f"  Total Score: {torrent['quality_score']:.1f}/25")
+        if debug_enabled:
+            logger.debug(f"Scoring: {torrent.get('name', 'Unknown')}")
+            logger.debug(f"  Seeds: {seeders}, Leechers: {leechers}, Ratio: {seed_ratio:.2f}, Seed Score: {seed_score:.1f}")
+            logger.debug(f"  Size: {size_gb:.2f} GB, Size Score: {size_score:.1f}")
+            logger.debug(f"  Trusted: {torrent.get('status') == 'trusted'}, Trusted Score: {trusted_score}")
+            logger.debug(f"  Total Score: {torrent['quality_score']:.1f}/25")
     
-    # Return sorted torrents
-    return sorted(torrents, key=lambda t: t.get('quality_score', 0), reverse=True)
+    # Return sorted torrents; every torrent has a score by now, so the key
+    # can be a plain item lookup
+    return sorted(torrents, key=itemgetter('quality_score'), reverse=True)
 
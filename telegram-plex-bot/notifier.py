@@ -3,16 +3,36 @@ from telegram import Bot, Update
 from telegram.ext import ContextTypes
 from config import TELEGRAM_BOT_TOKEN, ADMIN_USER_IDS
 import logging
-from typing import List, Optional, Union
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def notification_bot(bot: Optional[Bot] = None) -> AsyncIterator[Bot]:
+    """
+    Provides the bot to send notifications with.
+    
+    Args:
+        bot: The application's bot, which is preferred as it shares the
+            application's connection pool and rate limiter
+        
+    Yields:
+        The given bot, or a standalone bot that is shut down afterwards
+    """
+    if bot is not None:
+        yield bot
+    else:
+        async with Bot(token=TELEGRAM_BOT_TOKEN) as standalone_bot:
+            yield standalone_bot
+
 async def send_notification(
     update: Optional[Update] = None, 
     context: Optional[ContextTypes.DEFAULT_TYPE] = None, 
     message: str = "",
     chat_id: Optional[int] = None,
-    parse_mode: str = "HTML"
+    parse_mode: str = "HTML",
+    bot: Optional[Bot] = None
 ) -> bool:
     """
     Sends a notification message to a Telegram chat.
@@ -23,6 +43,7 @@ async def send_notification(
         message: The message to send
         chat_id: Optional chat ID to send to (if not using update)
         parse_mode: Message parse mode (HTML, Markdown, etc.)
+        bot: Optional bot to send with (defaults to the context's bot)
         
     Returns:
         True if the message was sent successfully, False otherwise
@@ -32,8 +53,6 @@ async def send_notification(
         return False
         
     try:
-        bot = Bot(token=TELEGRAM_BOT_TOKEN)
-        
         # Determine chat_id from update if not provided
         if not chat_id and update:
             chat_id = update.effective_chat.id
@@ -41,25 +60,30 @@ async def send_notification(
         if not chat_id:
             logger.error("No chat_id provided or available in update")
             return False
+        
+        if bot is None and context is not None:
+            bot = context.bot
             
-        await bot.send_message(
-            chat_id=chat_id, 
-            text=message,
-            parse_mode=parse_mode
-        )
+        async with notification_bot(bot) as bot:
+            await bot.send_message(
+                chat_id=chat_id, 
+                text=message,
+                parse_mode=parse_mode
+            )
         logger.debug(f"Notification sent to chat {chat_id}")
         return True
     except Exception as e:
         logger.error(f"Error sending notification: {e}")
         return False
 
-async def notify_admins(message: str, parse_mode: str = "HTML") -> bool:
+async def notify_admins(message: str, parse_mode: str = "HTML", bot: Optional[Bot] = None) -> bool:
     """
     Sends a notification to all admin users.
     
     Args:
         message: The message to send
         parse_mode: Message parse mode (HTML, Markdown, etc.)
+        bot: Optional bot to send with, such as the application's bot
         
     Returns:
         True if at least one message was sent successfully, False otherwise
@@ -69,20 +93,20 @@ async def notify_admins(message: str, parse_mode: str = "HTML") -> bool:
         return False
         
     try:
-        bot = Bot(token=TELEGRAM_BOT_TOKEN)
         success = False
         
-        for admin_id in ADMIN_USER_IDS:
-            try:
-                await bot.send_message(
-                    chat_id=admin_id, 
-                    text=message,
-                    parse_mode=parse_mode
-                )
-                success = True
-                logger.debug(f"Admin notification sent to {admin_id}")
-            except Exception as e:
-                logger.warning(f"Failed to notify admin {admin_id}: {e}")
+        async with notification_bot(bot) as bot:
+            for admin_id in ADMIN_USER_IDS:
+                try:
+                    await bot.send_message(
+                        chat_id=admin_id, 
+                        text=message,
+                        parse_mode=parse_mode
+                    )
+                    success = True
+                    logger.debug(f"Admin notification sent to {admin_id}")
+                except Exception as e:
+                    logger.warning(f"Failed to notify admin {admin_id}: {e}")
                 
         return success
     except Exception as e:
@@ -6,6 +6,38 @@ from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Connection to the Plex server, created on first use and reused afterwards
+_plex_server: Optional[PlexServer] = None
+
+def get_plex_server() -> PlexServer:
+    """
+    Returns the shared Plex server connection, connecting on first use.
+    
+    Returns:
+        The connected PlexServer
+    """
+    global _plex_server
+    if _plex_server is None:
+        _plex_server = PlexServer(PLEX_SERVER_URL, PLEX_TOKEN)
+    return _plex_server
+
+def plex_library_type(file_path: str) -> Optional[str]:
+    """
+    Determines which Plex library type a path belongs to.
+    
+    Args:
+        file_path: Path to the file that was added
+        
+    Returns:
+        'movie' or 'show', or None if all libraries should be scanned
+    """
+    path = file_path.lower() if file_path else ""
+    if "movie" in path:
+        return 'movie'
+    if "tv" in path or "series" in path:
+        return 'show'
+    return None
+
 def update_plex_library(file_path: str) -> str:
     """
     Updates the Plex library to scan for new media files.
@@ -18,14 +50,15 @@ def update_plex_library(file_path: str) -> str:
     """
     try:
         logger.info(f"🎬 Updating Plex library for: {os.path.basename(file_path) if file_path else 'all libraries'}")
-        plex = PlexServer(PLEX_SERVER_URL, PLEX_TOKEN)
+        plex = get_plex_server()
         
         # Get all library sections
         libraries = plex.library.sections()
         logger.info(f"📚 Found {len(libraries)} Plex libraries: {', '.join(lib.title for lib in libraries)}")
         
         # Update appropriate library based on file path
-        if file_path and ("movies" in file_path.lower() or "movie" in file_path.lower()):
+        library_type = plex_library_type(file_path)
+        if library_type == 'movie':
             movie_library = next((lib for lib in libraries if lib.type == 'movie'), None)
             if movie_library:
                 logger.info(f"🔄 Updating Movies library: {movie_library.title}")
@@ -34,7 +67,7 @@ def update_plex_library(file_path: str) -> str:
             else:
                 logger.warning("⚠️ No Movies library found in Plex")
                 message = "No Movies library found in Plex"
-        elif file_path and ("tv" in file_path.lower() or "series" in file_path.lower()):
+        elif library_type == 'show':
             tv_library = next((lib for lib in libraries if lib.type == 'show'), None)
             if tv_library:
                 logger.info(f"🔄 Updating TV Shows library: {tv_library.title}")
@@ -73,7 +106,7 @@ def get_recent_movies(limit: int = 5) -> Optional[List]:
     """
     try:
         logger.info(f"🔍 Retrieving {limit} recent movies from Plex")
-        plex = PlexServer(PLEX_SERVER_URL, PLEX_TOKEN)
+        plex = get_plex_server()
         
         # Try to get the Movies library
         movie_library = next((lib for lib in plex.library.sections() if lib.type == 'movie'), None)
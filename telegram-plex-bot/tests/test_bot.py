@@ -1,11 +1,17 @@
 import asyncio
+import time
 import pytest
 from unittest.mock import Mock, patch
 from telegram import Update, Message, Chat, User, CallbackQuery, InlineKeyboardMarkup
+from telegram.error import RetryAfter
 from telegram.ext import ContextTypes, ConversationHandler
 from bot import (
     help_command, search_movie, select_torrent_callback, process_torrent,
-    handle_confirmation, history_command, search_again_command,
+    handle_confirmation, history_command, search_again_command, cached_search,
+    error_message_lookup, plex_update_worker, request_plex_update,
+    add_to_search_history, mark_history_downloaded, torrent_button_label,
+    parse_torrent_size, add_and_process_torrent, _chat_download_locks,
+    build_result_pages,
     MOVIE, SELECT, CONFIRM
 )
 from datetime import datetime
@@ -34,6 +40,7 @@ async def create_mock_update_context(message_text=None, callback_data=None):
         update.message = message
         update.callback_query = None
         update.effective_chat = chat
+        update.effective_message = message
     
     if callback_data is not None:
         # Mock callback query
@@ -47,6 +54,7 @@ async def create_mock_update_context(message_text=None, callback_data=None):
         update.callback_query = query
         update.message = None
         update.effective_chat = chat
+        update.effective_message = query.message
     
     return update, context
 
@@ -119,6 +127,54 @@ async def test_search_movie_connection_error(mock_search):
     last_message = update.message.reply_text.call_args_list[-1][0][0]
     assert "Unable to connect to torrent site" in last_message
 
+@pytest.mark.asyncio
+async def test_new_search_replaces_shown_results():
+    update, context = await create_mock_update_context(message_text="First Movie")
+    update.effective_user = Mock(id=123, username="testuser")
+    status_message = Mock()
+    status_message.edit_text = AsyncMock()
+    update.message.reply_text = AsyncMock(return_value=status_message)
+    user_record = Mock(max_file_size=1 << 40)
+    
+    async def search(query):
+        return [{'name': query, 'size': '1073741824', 'seeders': '10'}]
+    
+    with patch('bot.cached_search', side_effect=search), \
+         patch('bot.user_manager.get_user', return_value=user_record), \
+         patch('security.security.is_user_allowed', return_value=True):
+        await search_movie(update, context)
+        await context.user_data['search_task']
+        first_search_id = context.user_data['search_id']
+        
+        update.message.text = "Second Movie"
+        result = await search_movie(update, context)
+        await context.user_data['search_task']
+    
+    # The second title is searched, and buttons of the first search expire
+    assert result == SELECT
+    assert context.user_data['search_id'] != first_search_id
+    assert context.user_data['torrent_results'][0]['name'] == "Second Movie"
+
+@pytest.mark.asyncio
+async def test_page_buttons_are_checked_against_the_search():
+    torrents = [{'name': f'Movie {i}', 'size': '1073741824', 'seeders': '10'} for i in range(7)]
+    update, context = await create_mock_update_context(callback_data="page_abc:1")
+    context.user_data.update(search_id="abc", result_pages=build_result_pages(torrents, search_id="abc"), search_page=0)
+    
+    assert await select_torrent_callback(update, context) == SELECT
+    assert context.user_data['search_page'] == 1
+    
+    # Out of range pages and other searches' buttons leave the page as is
+    for data in ("page_abc:2", "page_xyz:0"):
+        update.callback_query.data = data
+        assert await select_torrent_callback(update, context) == MOVIE
+        assert context.user_data['search_page'] == 1
+    
+    # Selections pick from the page the button was built for
+    update.callback_query.data = "select_abc:0:2"
+    assert await select_torrent_callback(update, context) == CONFIRM
+    assert context.user_data['selected_torrent']['name'] == "Movie 1"
+
 @pytest.mark.asyncio
 async def test_select_torrent_callback_expired():
     update, context = await create_mock_update_context(callback_data="1")
@@ -203,18 +259,18 @@ async def test_download_progress_updates():
         return None
     progress_task = asyncio.create_task(mock_progress())
     
-    with patch('bot.monitor_download') as mock_monitor, \
+    with patch('bot.retry_download') as mock_retry, \
          patch('bot.unpack_download_if_needed') as mock_unpack, \
          patch('bot.update_plex_library') as mock_plex, \
          patch('asyncio.sleep', new_callable=AsyncMock), \
          patch('asyncio.create_task', return_value=progress_task):
         
-        mock_monitor.return_value = True
+        mock_retry.return_value = True
         mock_unpack.return_value = None
         mock_plex.return_value = "Plex updated successfully"
         
         # Run the process_torrent function
-        await process_torrent(update, context, selected, info_hash)
+        await process_torrent(context.bot, 123, "testuser", selected, info_hash)
         
         # Verify the messages
         calls = [call[0][0] for call in status_message.edit_text.call_args_list]
@@ -242,6 +298,36 @@ async def test_search_history():
     assert len(context.user_data['search_history']) == 1
     assert context.user_data['search_history'][0]['query'] == "Test Movie"
 
+def test_mark_history_downloaded():
+    context = Mock()
+    context.user_data = {}
+    add_to_search_history(context, "Test Movie")
+    add_to_search_history(context, "Other Movie")
+    add_to_search_history(context, "Test Movie")
+    
+    torrent = {'name': 'Test Movie 1080p'}
+    mark_history_downloaded(context, "Test Movie", torrent)
+    
+    # Only the most recent search for the query is marked
+    history = context.user_data['search_history']
+    assert [entry['downloaded'] for entry in history] == [False, False, True]
+    assert history[2]['selected_torrent'] == torrent
+
+def test_parse_torrent_size_rejects_invalid_sizes():
+    assert parse_torrent_size("1073741824") == 1073741824
+    assert parse_torrent_size(1.5e9) == 1500000000
+    assert parse_torrent_size("1²") is None
+    assert parse_torrent_size(float('nan')) is None
+    assert parse_torrent_size(None) is None
+
+def test_torrent_button_label_shortens_long_names():
+    assert torrent_button_label({'name': 'Short Movie'}, 1) == "1. Short Movie"
+    
+    label = torrent_button_label({'name': 'Long.Movie.' * 20}, 2)
+    assert label.startswith("2. Long.Movie.")
+    assert label.endswith("…")
+    assert len(label) == len("2. ") + 60
+
 @pytest.mark.asyncio
 async def test_history_command_empty():
     update, context = await create_mock_update_context(message_text="/history")
@@ -311,25 +397,173 @@ async def test_process_torrent(cleanup_tasks):
     progress_task = asyncio.create_task(mock_progress())
     cleanup_tasks.append(progress_task)  # Add to cleanup list
     
-    with patch('bot.monitor_download') as mock_monitor, \
+    with patch('bot.retry_download') as mock_retry, \
          patch('bot.unpack_download_if_needed') as mock_unpack, \
          patch('bot.update_plex_library') as mock_plex, \
          patch('bot.send_notification', new_callable=AsyncMock) as mock_notify, \
          patch('asyncio.sleep', new_callable=AsyncMock), \
          patch('asyncio.create_task', return_value=progress_task):
         
-        mock_monitor.return_value = True
+        mock_retry.return_value = True
         mock_unpack.return_value = None
         mock_plex.return_value = "Plex updated successfully"
         
         # Start processing with timeout
         try:
             await asyncio.wait_for(
-                process_torrent(update, context, selected, info_hash),
+                process_torrent(context.bot, 123, "testuser", selected, info_hash),
                 timeout=5.0  # 5 second timeout
             )
         except asyncio.TimeoutError:
             pytest.fail("Test timed out")
 
+@pytest.mark.asyncio
+@patch('bot.search_tpb')
+async def test_cached_search_reuses_results(mock_search):
+    mock_search.return_value = [{'name': 'Cached Movie', 'size': '1073741824', 'seeders': '10'}]
+    
+    with patch.dict('bot._search_cache', clear=True):
+        first = await cached_search("Cached Movie")
+        second = await cached_search("  cached movie ")
+    
+    # Only the first search should hit the torrent site
+    mock_search.assert_called_once_with("Cached Movie")
+    assert first[0]['name'] == second[0]['name'] == 'Cached Movie'
+    assert second[0]['search_query'] == "  cached movie "
+
+@pytest.mark.asyncio
+async def test_cached_search_shares_inflight_search():
+    calls = []
+    
+    def slow_search(query):
+        calls.append(query)
+        time.sleep(0.1)
+        return [{'name': 'Popular Movie', 'size': '1073741824', 'seeders': '10'}]
+    
+    with patch('bot.search_tpb', side_effect=slow_search), \
+         patch.dict('bot._search_cache', clear=True):
+        results = await asyncio.gather(
+            cached_search("Popular Movie"),
+            cached_search("popular movie"),
+        )
+    
+    # Concurrent identical searches should result in a single site request
+    assert calls == ["Popular Movie"]
+    assert [r[0]['name'] for r in results] == ['Popular Movie', 'Popular Movie']
+
+def test_error_message_lookup_matches_subclasses():
+    # ConnectionRefusedError is a ConnectionError subclass
+    assert "Unable to connect" in error_message_lookup("search_movie")(ConnectionRefusedError())
+    assert error_message_lookup("search_movie")(ValueError()) == "Failed to search for movies. Please try again later."
+    assert error_message_lookup("history_command")(ValueError()) == "An unexpected error occurred. Please try again later."
+    # Connection and timeout errors are OSErrors too, but aren't file errors
+    assert "Lost connection" in error_message_lookup("process_torrent")(ConnectionResetError())
+    assert "timed out" in error_message_lookup("process_torrent")(TimeoutError())
+    assert "save the downloaded file" in error_message_lookup("process_torrent")(PermissionError())
+
+@pytest.mark.asyncio
+async def test_plex_updates_are_coalesced():
+    with patch('bot.update_plex_library', return_value="Plex updated") as mock_plex, \
+         patch('bot.PLEX_UPDATE_DEBOUNCE', 0.05), \
+         patch('bot.plex_update_queue', asyncio.Queue()):
+        worker = asyncio.create_task(plex_update_worker())
+        messages = await asyncio.gather(
+            request_plex_update("downloads/Movie One"),
+            request_plex_update("downloads/Movie Two"),
+        )
+        worker.cancel()
+    
+    # Both movies fall in the same library, so only one scan should run
+    mock_plex.assert_called_once()
+    assert messages == ["Plex updated", "Plex updated"]
+
+@pytest.mark.asyncio
+async def test_downloads_run_in_turn_per_chat():
+    events = []
+    
+    def fake_add(selected):
+        events.append(("add", selected['name']))
+        return selected['name']
+    
+    async def fake_process(bot, chat_id, requested_by, selected, info_hash):
+        events.append(("start", info_hash))
+        await asyncio.sleep(0.01)
+        events.append(("end", info_hash))
+    
+    with patch('bot.add_torrent', side_effect=fake_add), \
+         patch('bot.process_torrent', side_effect=fake_process), \
+         patch('bot.background_tasks', set()) as background_tasks, \
+         patch.dict('bot._chat_download_locks', clear=True):
+        requests = []
+        for name in ("One", "Two"):
+            update, context = await create_mock_update_context(callback_data="confirm_yes")
+            update.effective_user = Mock(id=123, username="testuser")
+            requests.append(add_and_process_torrent(update, context, {'name': name}))
+        await asyncio.gather(*requests)
+        while background_tasks:
+            await asyncio.gather(*background_tasks)
+        
+        # The chat's lock is dropped once its last download is done
+        assert not _chat_download_locks
+    
+    # The second torrent isn't even added before the first one is done
+    assert events == [
+        ("add", "One"), ("start", "One"), ("end", "One"),
+        ("add", "Two"), ("start", "Two"), ("end", "Two"),
+    ]
+
+@pytest.mark.asyncio
+async def test_process_torrent_error_is_last_status_edit():
+    edits = []
+    
+    async def slow_edit(text):
+        # The stage edit is still in flight when unpacking fails
+        await asyncio.sleep(0.05 if "Processing" in text else 0)
+        edits.append(text)
+    
+    status_message = Mock()
+    status_message.edit_text = slow_edit
+    bot = Mock()
+    bot.send_message = AsyncMock(return_value=status_message)
+    
+    with patch('bot.retry_download', new=AsyncMock(return_value=True)), \
+         patch('bot.unpack_download_if_needed', side_effect=IOError("Disk full")):
+        await process_torrent(bot, 123, "testuser", {'name': 'Test Movie'}, 'fake_hash')
+    
+    assert edits[-1] == "❌ An error occurred while processing 'Test Movie'"
+    assert "Failed to save the downloaded file" in bot.send_message.call_args[1]['text']
+
 if __name__ == "__main__":
-    pytest.main([__file__]) 
\ No newline at end of file
+    pytest.main([__file__]) 
+
+@pytest.mark.asyncio
+async def test_progress_edits_skip_flood_waits():
+    edits = []
+    
+    async def edit(text):
+        edits.append(text)
+        if "10%" in text:
+            await asyncio.sleep(0.01)
+            raise RetryAfter(30)
+    
+    status_message = Mock()
+    status_message.edit_text = edit
+    bot = Mock()
+    bot.send_message = AsyncMock(return_value=status_message)
+    
+    async def fake_retry(info_hash, on_progress):
+        await on_progress(10)
+        # Skipped, the 10% edit is still waiting
+        await on_progress(20)
+        return True
+    
+    with patch('bot.retry_download', side_effect=fake_retry), \
+         patch('bot.unpack_download_if_needed', return_value=None), \
+         patch('bot.request_plex_update', new=AsyncMock(return_value="Plex updated")), \
+         patch('bot.send_notification', new=AsyncMock()), \
+         patch('bot.notify_admins', new=AsyncMock()):
+        await process_torrent(bot, 123, "testuser", {'name': 'Test Movie'}, 'fake_hash')
+    
+    # The flood wait neither stops the processing nor gets retried
+    assert [text for text in edits if "complete" in text] == ["⏳ Downloading: Test Movie\n10% complete"]
+    assert edits[-1].startswith("✅ Movie 'Test Movie' is now on Plex!")
@@ -6,7 +6,7 @@ from downloader import search_tpb, add_torrent, monitor_download, retry_download
 
 # Test for search_tpb: simulate a HTTP error.
 def test_search_tpb_http_error(caplog):
-    with patch("downloader.requests.get") as mock_get:
+    with patch("downloader.requests.Session.get") as mock_get:
         # Simulate a request exception
         mock_get.side_effect = Exception("HTTP Error")
         result = search_tpb("Inception")
@@ -35,6 +35,31 @@ async def test_monitor_download_success():
         assert result is True
         mock_delete.assert_called_once()
 
+# Async test for monitor_download: progress is reported once per 10% step.
+@pytest.mark.asyncio
+async def test_monitor_download_reports_progress():
+    fake_torrent = MagicMock()
+    fake_torrent.state = "downloading"
+    fake_torrent.dlspeed = 1024**2
+    fake_torrent.eta = 60
+    progress_values = iter([0.05, 0.12, 0.15, 0.47, 1.0])
+    
+    def torrents_info(**kwargs):
+        fake_torrent.progress = next(progress_values)
+        return [fake_torrent]
+    
+    reported = []
+    
+    async def on_progress(percent):
+        reported.append(percent)
+    
+    with patch("downloader.qb.torrents_info", side_effect=torrents_info), \
+         patch("downloader.qb.torrents_delete"), \
+         patch("downloader.asyncio.sleep"):
+        result = await monitor_download("12345", timeout=5, poll_interval=1, on_progress=on_progress)
+        assert result is True
+        assert reported == [10, 40]
+
 # Async test for monitor_download: simulate a timeout.
 @pytest.mark.asyncio
 async def test_monitor_download_timeout():
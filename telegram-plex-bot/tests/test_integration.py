@@ -57,6 +57,7 @@ async def create_mock_update_context(message_text=None, callback_data=None, user
         message.edit_text = AsyncMock()
         update.message = message
         update.callback_query = None
+        update.effective_message = message
     
     if callback_data is not None:
         # Mock callback query
@@ -71,6 +72,7 @@ async def create_mock_update_context(message_text=None, callback_data=None, user
         query.edit_message_text = AsyncMock()
         update.callback_query = query
         update.message = None
+        update.effective_message = query.message
     
     return update, context
 
@@ -194,18 +196,18 @@ async def test_handle_confirmation():
 # Test torrent processing
 @pytest.mark.asyncio
 @patch('bot.add_torrent')
-@patch('bot.monitor_download')
+@patch('bot.retry_download')
 @patch('bot.unpack_download_if_needed')
 @patch('bot.update_plex_library')
 @patch('bot.asyncio.create_task')
-async def test_process_torrent_flow(mock_create_task, mock_update_plex, mock_unpack, mock_monitor, mock_add_torrent, cleanup_tasks):
+async def test_process_torrent_flow(mock_create_task, mock_update_plex, mock_unpack, mock_retry, mock_add_torrent, cleanup_tasks):
     update, context = await create_mock_update_context()
     context.bot.send_message = AsyncMock()
     selected_torrent = {"title": "Test Movie", "info_hash": "hash123"}
     
     # Mock successful download
     mock_add_torrent.return_value = "hash123"
-    mock_monitor.return_value = {"status": "completed", "path": "/downloads/test_movie"}
+    mock_retry.return_value = True
     mock_unpack.return_value = "/extracted/test_movie"
     mock_update_plex.return_value = True
     
@@ -215,10 +217,10 @@ async def test_process_torrent_flow(mock_create_task, mock_update_plex, mock_unp
     mock_task.cancel = Mock()
     mock_create_task.return_value = mock_task
     
-    await process_torrent(update, context, selected_torrent, "hash123")
+    await process_torrent(context.bot, 123, "testuser", selected_torrent, "hash123")
     
     mock_add_torrent.assert_called_once()
-    mock_monitor.assert_called_once()
+    mock_retry.assert_called_once()
     mock_unpack.assert_called_once()
     mock_update_plex.assert_called_once()
 
@@ -3,6 +3,7 @@ from typing import Dict, Optional, List, Any
 import json
 import os
 import logging
+import threading
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
@@ -51,6 +52,9 @@ class UserManager:
         """
         self.users_file = users_file
         self.users: Dict[int, User] = {}
+        # Users are updated and saved from worker threads; the lock is
+        # reentrant because the updating methods save while holding it
+        self._lock = threading.RLock()
         self.load_users()
     
     def load_users(self) -> None:
@@ -89,19 +93,24 @@ class UserManager:
             True if successful, False otherwise
         """
         try:
-            users_data = {
-                str(user_id): {
-                    **asdict(user),
-                    'role': user.role.value
+            with self._lock:
+                users_data = {
+                    str(user_id): {
+                        **asdict(user),
+                        'role': user.role.value
+                    }
+                    for user_id, user in self.users.items()
                 }
-                for user_id, user in self.users.items()
-            }
-            
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(os.path.abspath(self.users_file)), exist_ok=True)
-            
-            with open(self.users_file, 'w') as f:
-                json.dump(users_data, f, indent=2)
+                
+                # Create directory if it doesn't exist
+                os.makedirs(os.path.dirname(os.path.abspath(self.users_file)), exist_ok=True)
+                
+                # Write a temporary file and swap it in, so a crash mid-write
+                # can't leave a truncated users file behind
+                temp_file = f"{self.users_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(users_data, f, indent=2)
+                os.replace(temp_file, self.users_file)
             
             logger.debug(f"Saved {len(self.users)} users to {self.users_file}")
             return True
@@ -127,30 +136,31 @@ class UserManager:
             else self.DEFAULT_USER_SIZE_LIMIT
         )
         
-        # Check if user already exists
-        if existing_user := self.users.get(user_id):
-            logger.info(f"Updating existing user: {user_id} ({username})")
-            # Update username but keep other settings
-            existing_user.username = username
-            existing_user.last_active = datetime.now().isoformat()
+        with self._lock:
+            # Check if user already exists
+            if existing_user := self.users.get(user_id):
+                logger.info(f"Updating existing user: {user_id} ({username})")
+                # Update username but keep other settings
+                existing_user.username = username
+                existing_user.last_active = datetime.now().isoformat()
+                self.save_users()
+                return existing_user
+            
+            # Create new user
+            now = datetime.now().isoformat()
+            user = User(
+                user_id=user_id,
+                username=username,
+                role=role,
+                max_file_size=max_file_size,
+                created_at=now,
+                last_active=now
+            )
+            
+            self.users[user_id] = user
+            logger.info(f"Added new user: {user_id} ({username}) with role {role.value}")
             self.save_users()
-            return existing_user
-        
-        # Create new user
-        now = datetime.now().isoformat()
-        user = User(
-            user_id=user_id,
-            username=username,
-            role=role,
-            max_file_size=max_file_size,
-            created_at=now,
-            last_active=now
-        )
-        
-        self.users[user_id] = user
-        logger.info(f"Added new user: {user_id} ({username}) with role {role.value}")
-        self.save_users()
-        return user
+            return user
     
     def get_user(self, user_id: int) -> Optional[User]:
         """
@@ -174,11 +184,12 @@ class UserManager:
         Returns:
             True if successful, False if user not found
         """
-        if user := self.users.get(user_id):
-            user.last_active = datetime.now().isoformat()
-            self.save_users()
-            return True
-        return False
+        with self._lock:
+            if user := self.users.get(user_id):
+                user.last_active = datetime.now().isoformat()
+                self.save_users()
+                return True
+            return False
     
     def is_admin(self, user_id: int) -> bool:
         """
@@ -220,17 +231,18 @@ class UserManager:
         Returns:
             True if successful, False if user not found
         """
-        if user := self.get_user(user_id):
-            user.role = role
-            
-            # Update max file size based on new role
-            if role == UserRole.ADMIN:
-                user.max_file_size = self.DEFAULT_ADMIN_SIZE_LIMIT
-            
-            self.save_users()
-            logger.info(f"Updated user {user_id} role to {role.value}")
-            return True
-        return False
+        with self._lock:
+            if user := self.get_user(user_id):
+                user.role = role
+                
+                # Update max file size based on new role
+                if role == UserRole.ADMIN:
+                    user.max_file_size = self.DEFAULT_ADMIN_SIZE_LIMIT
+                
+                self.save_users()
+                logger.info(f"Updated user {user_id} role to {role.value}")
+                return True
+            return False
     
     def set_max_file_size(self, user_id: int, max_size: int) -> bool:
         """
@@ -243,12 +255,13 @@ class UserManager:
         Returns:
             True if successful, False if user not found
         """
-        if user := self.get_user(user_id):
-            user.max_file_size = max_size
-            self.save_users()
-            logger.info(f"Updated user {user_id} max file size to {max_size} bytes")
-            return True
-        return False
+        with self._lock:
+            if user := self.get_user(user_id):
+                user.max_file_size = max_size
+                self.save_users()
+                logger.info(f"Updated user {user_id} max file size to {max_size} bytes")
+                return True
+            return False
     
     def get_all_users(self) -> List[User]:
         """